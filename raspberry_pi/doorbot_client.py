@@ -17,6 +17,14 @@ POLL_INTERVAL = 1.0
 UNLOCK_HOLD_TIME = 10
 REVERSE_TIME = 6.5  # Static time to reverse motor
 MAX_SOUND_DURATION = 10  # seconds, kill aplay after this
+UNLOCK_MAX_AGE = 60  # seconds; with wake-ups on, older unlocks whose letmein window we missed are dropped
+
+# UDP wake-up notifications (disabled unless the server shares this key)
+NOTIFY_KEY = os.getenv("DOORBOT_NOTIFY_KEY", "")
+NOTIFY_PORT = 8879
+HEARTBEAT_INTERVAL = 30.0  # Poll interval while wake-ups are arriving
+NOTIFY_REFRESH = 60  # Seconds between registrations; each one gets a probe datagram back
+NOTIFY_STALE = 180  # Fall back to POLL_INTERVAL after this long without a datagram
 
 # GPIO Pin Configuration
 RELAY_PIN = 4
@@ -53,6 +61,34 @@ def poll_server():
     except:
         return None
 
+def start_notify_listener():
+    """Start the UDP wake-up listener, or return None if notifications are disabled"""
+    if not NOTIFY_KEY:
+        return None
+    # Imported here so notify.py is only needed when wake-ups are enabled
+    from notify import NotifyListener
+    try:
+        listener = NotifyListener(NOTIFY_KEY, NOTIFY_PORT).start()
+        print(f"[{get_timestamp()}] Listening for wake-ups on UDP {listener.port}")
+        return listener
+    except OSError as e:
+        print(f"[{get_timestamp()}] Wake-up listener failed: {e}")
+        return None
+
+def register_for_notifications(listener):
+    """Ask the server to send wake-ups to our UDP port. Returns None on success, else the error."""
+    from notify import sign_registration
+    try:
+        response = requests.post(SERVER_URL + '/notify',
+                                 json=sign_registration(NOTIFY_KEY, listener.port),
+                                 headers={"Authorization": "Bearer " + API_KEY},
+                                 timeout=5)
+        if response.status_code == 200:
+            return None
+        return f"HTTP {response.status_code}"
+    except Exception as e:
+        return str(e)
+
 def get_sound_list():
     try:
         return sorted([f for f in os.listdir(SOUNDS_DIR) if f.endswith('.wav')])
@@ -165,12 +201,21 @@ def unlock_door(pwm, sound=None):
 def main():
     print(f"\nDOORBOT CLIENT - {SERVER_URL}")
     pwm = setup_gpio()
+    listener = start_notify_listener()
+    next_registration = 0
+    registration_error = None
+    last_packets = 0
+    last_packet_time = None
+    last_state_version = 0
+    last_boot_id = None
+    last_unlock_count = None
     consecutive_errors = 0
     last_sound_push = 0
 
     # Push sound list immediately on start
     push_sound_list()
     last_sound_push = time.time()
+    start_time = last_sound_push
 
     try:
         while True:
@@ -180,6 +225,20 @@ def main():
                 push_sound_list()
                 last_sound_push = now
 
+            # Register for wake-ups on start and every NOTIFY_REFRESH seconds,
+            # whether or not the last attempt worked; only log new errors
+            if listener and now >= next_registration:
+                error = register_for_notifications(listener)
+                if error and error != registration_error:
+                    print(f"[{get_timestamp()}] Wake-up registration failed: {error}")
+                registration_error = error
+                next_registration = now + NOTIFY_REFRESH
+
+            # Clear before polling so a wake-up that arrives mid-poll or
+            # mid-unlock triggers another poll straight away
+            if listener:
+                listener.wake.clear()
+
             status = poll_server()
             if status is None:
                 consecutive_errors += 1
@@ -187,13 +246,59 @@ def main():
                     print("Too many errors")
                     break
             else:
+                # Re-register right away if the server was unreachable or
+                # restarted (new boot id, or version went backwards), as it may
+                # have forgotten us
+                version = status.get('state_version', 0)
+                boot_id = status.get('boot_id')
+                restarted = (last_boot_id is not None and boot_id != last_boot_id
+                             or version < last_state_version)
+                if consecutive_errors or restarted:
+                    next_registration = now
+                last_state_version = version
+                last_boot_id = boot_id
                 consecutive_errors = 0
-                if status.get('letmein', False):
+
+                # With wake-ups on we may sleep through the chatbot's 3s letmein
+                # window (lost wake-up), so also act on unlocks the server counted
+                # since our last poll. Plain polling keeps the original behaviour.
+                unlock_count = status.get('unlock_count', 0)
+                unlock_age = status.get('unlock_age')
+                if last_unlock_count is None:
+                    # First poll since start: a previous run may have served
+                    # older unlocks, so only trust ones issued after we started
+                    new_unlock = unlock_count > 0
+                    max_age = min(UNLOCK_MAX_AGE, time.time() - start_time)
+                elif restarted:
+                    # The server's count started again from zero, and none of
+                    # the new process's unlocks can have been served yet
+                    new_unlock = unlock_count > 0
+                    max_age = UNLOCK_MAX_AGE
+                else:
+                    new_unlock = unlock_count > last_unlock_count
+                    max_age = UNLOCK_MAX_AGE
+                missed_unlock = (listener is not None and new_unlock
+                                 and unlock_age is not None and unlock_age <= max_age)
+                last_unlock_count = unlock_count
+                if status.get('letmein', False) or missed_unlock:
                     unlock_door(pwm, sound=status.get('sound', ''))
-            time.sleep(POLL_INTERVAL)
+
+            # Only back off to the heartbeat while signed datagrams (wake-ups or
+            # registration probes) are actually reaching us
+            if listener and listener.packets != last_packets:
+                last_packets = listener.packets
+                last_packet_time = time.time()
+            wakeups_arriving = (last_packet_time is not None
+                                and time.time() - last_packet_time < NOTIFY_STALE)
+            if status is not None and wakeups_arriving:
+                listener.wake.wait(HEARTBEAT_INTERVAL)
+            else:
+                time.sleep(POLL_INTERVAL)
     except KeyboardInterrupt:
         print("Shutdown")
     finally:
+        if listener:
+            listener.close()
         pwm.stop()
         GPIO.output(RELAY_PIN, GPIO.LOW)
         GPIO.cleanup()
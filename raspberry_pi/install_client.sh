@@ -66,6 +66,7 @@ mkdir -p "$INSTALL_DIR"
 # Copy client script
 if [ -f "doorbot_client.py" ]; then
     cp doorbot_client.py "$INSTALL_DIR/"
+    cp notify.py "$INSTALL_DIR/"
     chmod +x "$INSTALL_DIR/doorbot_client.py"
     echo "✓ Client installed to: $INSTALL_DIR/doorbot_client.py"
 else
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Doorbot wake-up notifications - UDP listener for the Pi client
+
+The server sends a tiny "state version N" datagram to every registered Pi
+whenever the door state changes. The client uses it to wake the poll loop
+immediately instead of waiting out the poll interval.
+
+Packet layout (28 bytes):
+  4 bytes  magic b"DBN1"
+  8 bytes  state version (unsigned, big-endian)
+  16 bytes HMAC-SHA256 of the first 12 bytes, truncated
+"""
+import hashlib
+import hmac
+import socket
+import struct
+import threading
+import time
+
+MAGIC = b"DBN1"
+HEADER = struct.Struct("!4sQ")
+MAC_SIZE = 16
+PACKET_SIZE = HEADER.size + MAC_SIZE
+
+
+def _mac(key, message):
+    return hmac.new(key.encode(), message, hashlib.sha256).digest()[:MAC_SIZE]
+
+
+def unpack_notification(key, packet):
+    """Return the state version carried by packet, or None if it is not authentic."""
+    if len(packet) != PACKET_SIZE:
+        return None
+    header, mac = packet[:HEADER.size], packet[HEADER.size:]
+    if not hmac.compare_digest(mac, _mac(key, header)):
+        return None
+    magic, version = HEADER.unpack(header)
+    if magic != MAGIC:
+        return None
+    return version
+
+
+def sign_registration(key, port, timestamp=None):
+    """Build the JSON body for POST /notify."""
+    if timestamp is None:
+        timestamp = int(time.time())
+    message = f"register:{port}:{timestamp}".encode()
+    return {"port": port, "timestamp": timestamp, "mac": _mac(key, message).hex()}
+
+
+class NotifyListener:
+    """Background UDP listener that sets `wake` when a newer state version arrives.
+
+    `packets` counts every authentic datagram, so the client can tell whether
+    wake-ups actually reach it.
+    """
+
+    def __init__(self, key, port, host="0.0.0.0"):
+        self.key = key
+        self.wake = threading.Event()
+        self.last_version = None
+        self.packets = 0  # authentic packets received, including repeats and probes
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.port = self.sock.getsockname()[1]
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.sock.close()
+
+    def _run(self):
+        while True:
+            try:
+                packet, _ = self.sock.recvfrom(64)
+            except OSError:
+                return  # socket closed
+            version = unpack_notification(self.key, packet)
+            if version is None:
+                continue
+            self.packets += 1
+            # The server sends each notification more than once; only wake on news.
+            # A lower version means the server restarted, which is news too.
+            if version == self.last_version:
+                continue
+            self.last_version = version
+            self.wake.set()
@@ -122,6 +122,7 @@ fi
 
 echo "Copying doorbot_client.py..."
 sudo cp doorbot_client.py "$INSTALL_DIR/"
+sudo cp notify.py "$INSTALL_DIR/"
 sudo chmod +x "$INSTALL_DIR/doorbot_client.py"
 echo "✓ Client installed to: /home/$PI_USER/doorbot/doorbot_client.py"
 
@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+"""
+Doorbot Simulator - replay server/switch/network traces against doorbot_client.py
+
+Runs the real client loop (main, unlock_door, poll_server, ...) on a simulated
+GPIO/PWM/limit-switch backend and a virtual clock, so thousands of unlock
+cycles take seconds instead of hours and no Raspberry Pi is needed.
+
+Usage:
+    python3 simulator.py                     # 1000 synthetic unlock cycles
+    python3 simulator.py --cycles 5000 --notify
+    python3 simulator.py --save trace.json   # write the synthetic trace
+    python3 simulator.py --trace trace.json  # replay a recorded trace
+
+Trace format (JSON list of events, times in seconds from start):
+    {"t": 12.0, "type": "command", "letmein": true, "sound": ""}
+    {"t": 15.0, "type": "command", "letmein": false}
+    {"t": 11.0, "type": "switch", "delay": 2.5}     # limit switch closes 2.5s
+                                                    # after motor start (null = jammed)
+    {"t": 40.0, "type": "outage", "duration": 20, "mode": "refused"}
+                                                    # or "timeout" (requests hang)
+    {"t": 90.0, "type": "latency", "seconds": 0.05}  # server response time
+    {"t": 95.0, "type": "restart"}                   # server.py restarts, losing state
+
+The server side is the real server.py (Flask), so it needs requirements.txt.
+"""
+
+import argparse
+import contextlib
+import heapq
+import importlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import types
+
+try:
+    import RPi.GPIO  # noqa: F401
+except ImportError:
+    # doorbot_client imports RPi.GPIO at load; off the Pi, register an empty
+    # placeholder. run() swaps in SimGPIO either way.
+    sys.modules['RPi'] = types.ModuleType('RPi')
+    sys.modules['RPi.GPIO'] = sys.modules['RPi'].GPIO = types.ModuleType('RPi.GPIO')
+
+# server.py lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import server as doorbot_server
+import doorbot_client as client
+import notify as notify_module  # run() has a `notify` flag
+
+RESTART_SEC = 10  # doorbot-client.service RestartSec
+
+
+class SimulationEnd(BaseException):
+    """Raised from the clock once the trace is over and the door is idle.
+
+    A BaseException, like KeyboardInterrupt, so the client's
+    `except Exception` handlers let it through.
+    """
+
+
+class VirtualClock:
+    """Stands in for the `time` module: time() and sleep() run on virtual time"""
+
+    def __init__(self, end):
+        self.now = 0.0
+        self.end = end
+        self.can_stop = lambda: True
+        self._events = []
+        self._seq = 0
+        self.wakeups = 0
+        self.busy_real = 0.0  # real seconds between wakeups (client code plus harness)
+        self.harness_real = 0.0  # part of busy_real spent in simulated server handlers
+        self._resumed = time.perf_counter()
+
+    def time(self):
+        return self.now
+
+    def schedule(self, at, callback):
+        heapq.heappush(self._events, (at, self._seq, callback))
+        self._seq += 1
+
+    def advance(self, seconds, until=None):
+        """Move time forward, firing scheduled events; stop early once until() is true"""
+        target = self.now + seconds
+        while self._events and self._events[0][0] <= target:
+            at, _, callback = heapq.heappop(self._events)
+            self.now = max(self.now, at)
+            callback()
+            if until and until():
+                return True
+        self.now = target
+        return False
+
+    def block(self, seconds, until=None):
+        """A blocking call in the client: one CPU wakeup when it returns"""
+        self.busy_real += time.perf_counter() - self._resumed
+        if self.now >= self.end and self.can_stop():
+            raise SimulationEnd()
+        result = self.advance(seconds, until)
+        self.wakeups += 1
+        self._resumed = time.perf_counter()
+        return result
+
+    def sleep(self, seconds):
+        self.block(seconds)
+
+
+class SimEvent:
+    """threading.Event on virtual time, used for NotifyListener.wake"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.flag = False
+
+    def set(self):
+        self.flag = True
+
+    def clear(self):
+        self.flag = False
+
+    def is_set(self):
+        return self.flag
+
+    def wait(self, timeout):
+        if not self.flag:
+            self.clock.block(timeout, until=self.is_set)
+        return self.flag
+
+
+class SimListener:
+    """Replaces notify.NotifyListener; the server delivers wake-ups directly"""
+
+    def __init__(self, clock, key, port):
+        self.key = key
+        self.port = port
+        self.wake = SimEvent(clock)
+        self.last_version = None
+        self.packets = 0
+
+    def start(self):
+        return self
+
+    def close(self):
+        pass
+
+    def deliver(self, packet):
+        version = notify_module.unpack_notification(self.key, packet)
+        if version is None:
+            return
+        self.packets += 1
+        if version != self.last_version:
+            self.last_version = version
+            self.wake.set()
+
+
+class SimPWM:
+    def __init__(self, gpio):
+        self.gpio = gpio
+
+    def start(self, duty_cycle):
+        self.gpio.motor_start()
+
+    def stop(self):
+        self.gpio.motor_stop()
+
+
+class SimGPIO:
+    """RPi.GPIO stand-in with a motor that closes the limit switch after a delay"""
+
+    BCM = 11
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_UP = 22
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.pins = {}
+        self.switch_delay = 2.5  # seconds from motor start to limit switch; None = jammed
+        self.switch_closed = False
+        self.on_unlock = lambda: None
+        self._motor_started = None
+        self._motor_run = 0
+        self.motor_on_time = 0.0
+        self.unlocks = 0
+        self.switch_timeouts = 0
+
+    def setmode(self, mode):
+        pass
+
+    def setwarnings(self, flag):
+        pass
+
+    def setup(self, pin, mode, initial=LOW, pull_up_down=None):
+        self.pins[pin] = initial
+
+    def output(self, pin, value):
+        if pin == client.RELAY_PIN and value and not self.pins.get(pin):
+            self.unlocks += 1
+            self.on_unlock()
+        self.pins[pin] = value
+
+    def input(self, pin):
+        if pin == client.BUTTON_PIN:
+            return self.LOW if self.switch_closed else self.HIGH
+        return self.pins.get(pin, self.LOW)
+
+    def PWM(self, pin, frequency):
+        return SimPWM(self)
+
+    def cleanup(self):
+        self.pins = {}
+
+    def relay_on(self):
+        return bool(self.pins.get(client.RELAY_PIN))
+
+    def motor_start(self):
+        if self._motor_started is not None:
+            return
+        self._motor_started = self.clock.now
+        self._motor_run += 1
+        if self.pins.get(client.DIRECTION_PIN):
+            if self.switch_delay is not None:
+                run = self._motor_run
+                self.clock.schedule(self.clock.now + self.switch_delay,
+                                    lambda: self._close_switch(run))
+        else:
+            self.switch_closed = False  # reversing releases the switch
+
+    def motor_stop(self):
+        if self._motor_started is None:
+            return
+        self.motor_on_time += self.clock.now - self._motor_started
+        self._motor_started = None
+        if self.pins.get(client.DIRECTION_PIN) and not self.switch_closed:
+            self.switch_timeouts += 1
+
+    def _close_switch(self, run):
+        if run == self._motor_run and self._motor_started is not None:
+            self.switch_closed = True
+
+
+class SimResponse:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self._data = data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise ConnectionError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self._data
+
+
+class SimSocket:
+    """Replaces server.notify_socket; delivers datagrams to the SimListener"""
+
+    def __init__(self, sim_server):
+        self.sim_server = sim_server
+
+    def sendto(self, packet, address):
+        sim = self.sim_server
+        if sim.listener and sim.rng.random() >= sim.notify_loss:
+            sim.clock.schedule(sim.clock.now + sim.latency,
+                               lambda: sim.listener.deliver(packet))
+
+
+class SimServer:
+    """Stands in for the `requests` module, in front of the real server.py
+
+    POSTs go through server.app's test client. GET / calls
+    server.status_payload() directly, since a Flask round trip per poll would
+    dominate the simulation; both paths share server.py's state and logic.
+    """
+
+    def __init__(self, clock, notify_key="", notify_loss=0.0, seed=0):
+        self.clock = clock
+        self.notify_key = notify_key
+        self.latency = 0.02
+        self.outage_until = 0.0
+        self.outage_mode = "refused"
+        self.notify_loss = notify_loss
+        self.listener = None
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.commands = []  # [time, served]
+        self.boot()
+
+    def boot(self):
+        """(Re)start the server with fresh state, as after a process restart"""
+        importlib.reload(doorbot_server)
+        doorbot_server.time = self.clock
+        doorbot_server.NOTIFY_KEY = self.notify_key
+        doorbot_server.notify_socket = SimSocket(self)
+        self.app = doorbot_server.app.test_client()
+
+    def get(self, url, headers=None, timeout=None):
+        return self._request('GET', url, None, timeout)
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        return self._request('POST', url, json, timeout)
+
+    def _request(self, method, url, data, timeout):
+        # Time spent here (including trace events fired by clock.advance) is
+        # harness work, so keep it out of the client's loop cost
+        start = time.perf_counter()
+        try:
+            return self._handle(method, url, data, timeout)
+        finally:
+            self.clock.harness_real += time.perf_counter() - start
+
+    def _handle(self, method, url, data, timeout):
+        self.requests += 1
+        if self.clock.now < self.outage_until:
+            if self.outage_mode == "timeout":
+                self.clock.advance(timeout or 0)
+            raise ConnectionError("simulated outage")
+        self.clock.advance(self.latency)
+        path = url[len(client.SERVER_URL):] or '/'
+        if method == 'GET' and path == '/':
+            return SimResponse(200, doorbot_server.status_payload())
+        if method == 'GET':
+            response = self.app.get(path)
+        else:
+            response = self.app.post(path, json=data)
+        return SimResponse(response.status_code, response.get_json())
+
+    def set_state(self, letmein, sound=""):
+        """Send a command the way the chatbot does"""
+        if letmein:
+            self.commands.append([self.clock.now, False])
+        self.app.post('/', json={"status": {"letmein": letmein, "sound": sound}})
+
+    def start_outage(self, duration, mode):
+        self.outage_until = max(self.outage_until, self.clock.now + duration)
+        self.outage_mode = mode
+
+
+class SimProcess:
+    """subprocess.Popen stand-in for aplay"""
+
+    def __init__(self, clock, duration):
+        self.clock = clock
+        self.done_at = clock.now + duration
+
+    def poll(self):
+        return 0 if self.clock.now >= self.done_at else None
+
+    def kill(self):
+        self.done_at = self.clock.now
+
+
+class SimSubprocess:
+    def __init__(self, clock, sound_duration=3.0):
+        self.clock = clock
+        self.sound_duration = sound_duration
+
+    def Popen(self, args):
+        return SimProcess(self.clock, self.sound_duration)
+
+
+def synthetic_trace(cycles, seed=0, gap=120.0, window=3.0,
+                    outage_rate=0.02, jam_rate=0.005):
+    """Chatbot-style unlock commands with random switch timings and outages"""
+    rng = random.Random(seed)
+    events = []
+    t = 10.0
+    for _ in range(cycles):
+        t += rng.expovariate(1 / gap)
+        delay = None if rng.random() < jam_rate else round(rng.uniform(1.5, 4.0), 2)
+        events.append({"t": round(t, 2), "type": "switch", "delay": delay})
+        events.append({"t": round(t, 2), "type": "command", "letmein": True, "sound": ""})
+        events.append({"t": round(t + window, 2), "type": "command", "letmein": False})
+        if rng.random() < outage_rate:
+            events.append({"t": round(t + window + rng.uniform(0, gap), 2), "type": "outage",
+                           "duration": round(rng.uniform(5, 60), 1),
+                           "mode": rng.choice(["refused", "timeout"])})
+    return events
+
+
+def run(events, notify=False, notify_loss=0.0, seed=0, end=None):
+    """Replay events against doorbot_client.main() and return the metrics dict"""
+    if end is None:
+        end = max((e['t'] for e in events), default=0) + 60
+    clock = VirtualClock(end)
+    gpio = SimGPIO(clock)
+    server = SimServer(clock, notify_key='simulated' if notify else '',
+                       notify_loss=notify_loss, seed=seed)
+    latencies = []
+
+    def on_unlock():
+        # With wake-ups the client catches up on every command still young
+        # enough; plain polling only acts on the letmein of the latest one
+        pending = server.commands if notify else server.commands[-1:]
+        for command in pending:
+            if not command[1] and clock.now - command[0] <= client.UNLOCK_MAX_AGE:
+                command[1] = True
+                latencies.append(clock.now - command[0])
+
+    def make_listener(key, port):
+        server.listener = SimListener(clock, key, port)
+        return server.listener
+
+    gpio.on_unlock = on_unlock
+    clock.can_stop = lambda: not gpio.relay_on()
+
+    for event in events:
+        kind = event['type']
+        if kind == 'command':
+            action = lambda e=event: server.set_state(e['letmein'], e.get('sound', ''))
+        elif kind == 'switch':
+            action = lambda e=event: setattr(gpio, 'switch_delay', e['delay'])
+        elif kind == 'outage':
+            action = lambda e=event: server.start_outage(e['duration'], e.get('mode', 'refused'))
+        elif kind == 'latency':
+            action = lambda e=event: setattr(server, 'latency', e['seconds'])
+        elif kind == 'restart':
+            action = server.boot
+        else:
+            raise ValueError(f"Unknown trace event type: {kind}")
+        clock.schedule(event['t'], action)
+
+    patches = [
+        (client, 'GPIO', gpio),
+        (client, 'time', clock),
+        (client, 'requests', server),
+        (client, 'subprocess', SimSubprocess(clock)),
+        (client, 'NOTIFY_KEY', 'simulated' if notify else ''),
+        (notify_module, 'NotifyListener', make_listener),
+        (notify_module, 'time', clock),  # registration timestamps
+    ]
+    saved = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    restarts = 0
+    real_start = time.perf_counter()
+    try:
+        for module, name, value in patches:
+            setattr(module, name, value)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            while True:
+                try:
+                    client.main()
+                    # "Too many errors": systemd restarts the client
+                    restarts += 1
+                    clock.sleep(RESTART_SEC)
+                except SimulationEnd:
+                    break
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+    real_time = time.perf_counter() - real_start
+
+    missed = sum(1 for _, served in server.commands if not served)
+    return {
+        "virtual_time": clock.now,
+        "real_time": real_time,
+        "commands": len(server.commands),
+        "unlocks": gpio.unlocks,
+        "missed_commands": missed,
+        "switch_timeouts": gpio.switch_timeouts,
+        "restarts": restarts,
+        "motor_on_time": gpio.motor_on_time,
+        "http_requests": server.requests,
+        "wakeups": clock.wakeups,
+        "loop_cost_us": (clock.busy_real - clock.harness_real) / max(clock.wakeups, 1) * 1e6,
+        "unlock_latency": latencies,
+        "relay_left_on": gpio.relay_on(),
+    }
+
+
+def print_report(stats):
+    hours = stats['virtual_time'] / 3600
+    print("=" * 60)
+    print("🚪 Doorbot Simulation Report")
+    print("=" * 60)
+    print(f"Virtual time:      {hours:.1f} h in {stats['real_time']:.2f} s real "
+          f"({stats['virtual_time'] / max(stats['real_time'], 1e-9):,.0f}x)")
+    print(f"Commands:          {stats['commands']}")
+    print(f"Unlocks:           {stats['unlocks']}")
+    print(f"Missed commands:   {stats['missed_commands']}")
+    print(f"Switch timeouts:   {stats['switch_timeouts']}")
+    print(f"Client restarts:   {stats['restarts']}")
+    print(f"Motor-on time:     {stats['motor_on_time']:.1f} s "
+          f"({stats['motor_on_time'] / max(stats['unlocks'], 1):.2f} s per unlock)")
+    print(f"HTTP requests:     {stats['http_requests']} ({stats['http_requests'] / max(hours, 1e-9):.0f}/h)")
+    print(f"CPU wakeups:       {stats['wakeups']} ({stats['wakeups'] / max(hours, 1e-9):.0f}/h)")
+    print(f"Loop cost:         {stats['loop_cost_us']:.1f} µs per wakeup "
+          f"(client code, excluding simulated HTTP)")
+    if stats['unlock_latency']:
+        latency = sorted(stats['unlock_latency'])
+        print(f"Command → unlock:  median {statistics.median(latency) * 1000:.0f} ms, "
+              f"max {latency[-1] * 1000:.0f} ms")
+    if stats['relay_left_on']:
+        print("⚠ Relay left on at end of trace")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay traces against doorbot_client.py on simulated hardware")
+    parser.add_argument('--trace', help="JSON trace file to replay (default: synthetic)")
+    parser.add_argument('--cycles', type=int, default=1000, help="synthetic unlock cycles")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--notify', action='store_true', help="enable UDP wake-ups")
+    parser.add_argument('--notify-loss', type=float, default=0.0, help="fraction of wake-ups dropped")
+    parser.add_argument('--save', help="write the synthetic trace to this file and exit")
+    args = parser.parse_args()
+
+    if args.trace:
+        with open(args.trace) as f:
+            events = json.load(f)
+    else:
+        events = synthetic_trace(args.cycles, seed=args.seed)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(events, f, indent=1)
+        print(f"{len(events)} events written to {args.save}")
+        return
+
+    print_report(run(events, notify=args.notify, notify_loss=args.notify_loss, seed=args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Regression tests for simulator.py
+
+Replays short fixed traces against doorbot_client.py and checks the numbers,
+so a client change that breaks the simulator's patching fails loudly.
+
+Usage:
+    python3 test_simulator.py      # or: python3 -m pytest test_simulator.py
+"""
+import simulator
+
+# Unlock at 10s (switch after 2s), a second $letmein at 15s while the door is
+# still busy, and a jammed switch at 100s (30s timeout)
+TRACE = [
+    {"t": 10, "type": "switch", "delay": 2.0},
+    {"t": 10, "type": "command", "letmein": True, "sound": "none"},
+    {"t": 13, "type": "command", "letmein": False},
+    {"t": 15, "type": "command", "letmein": True, "sound": "none"},
+    {"t": 18, "type": "command", "letmein": False},
+    {"t": 100, "type": "switch", "delay": None},
+    {"t": 100, "type": "command", "letmein": True, "sound": "none"},
+    {"t": 103, "type": "command", "letmein": False},
+]
+# Unlocks run ~2s to the switch plus the 6.5s reverse; the jam runs the 30s
+# timeout plus the reverse. Times are in 0.1s switch-polling steps.
+MOTOR_ON_TIME = 53.7
+MOTOR_ON_TIME_WITHOUT_SECOND = 45.2
+
+
+def check_trace(stats, unlocks=3, motor_on_time=MOTOR_ON_TIME):
+    assert stats['commands'] == 3
+    assert stats['unlocks'] == unlocks
+    assert stats['missed_commands'] == 3 - unlocks
+    assert stats['switch_timeouts'] == 1
+    assert stats['restarts'] == 0
+    assert abs(stats['motor_on_time'] - motor_on_time) < 0.01
+    assert not stats['relay_left_on']
+
+
+def test_polling():
+    # Plain polling ignores the $letmein that arrives mid-unlock, as it always has
+    stats = simulator.run(TRACE)
+    check_trace(stats, unlocks=2, motor_on_time=MOTOR_ON_TIME_WITHOUT_SECOND)
+    assert max(stats['unlock_latency']) < simulator.client.POLL_INTERVAL
+
+
+def test_notify():
+    # The command that arrived mid-unlock is caught up from unlock_count
+    stats = simulator.run(TRACE, notify=True)
+    check_trace(stats)
+    assert stats['unlock_latency'][1] > 10
+    assert stats['http_requests'] < simulator.run(TRACE)['http_requests'] / 2
+    assert max(stats['unlock_latency'][0], stats['unlock_latency'][2]) < 0.1
+
+
+def test_notify_all_packets_lost():
+    # No datagram ever arrives, so the client must keep polling every second
+    stats = simulator.run(TRACE, notify=True, notify_loss=1.0)
+    check_trace(stats)
+    assert stats['unlock_latency'][0] < simulator.client.POLL_INTERVAL
+
+
+def test_outage_at_startup():
+    # Server unreachable when the client starts; with wake-ups on, the unlock
+    # sent meanwhile is picked up from unlock_count once the server answers
+    trace = [
+        {"t": 0, "type": "outage", "duration": 5, "mode": "refused"},
+        {"t": 2, "type": "command", "letmein": True, "sound": "none"},
+        {"t": 4, "type": "command", "letmein": False},
+    ]
+    stats = simulator.run(trace, notify=True)
+    assert stats['unlocks'] == 1
+    assert stats['missed_commands'] == 0
+    assert stats['restarts'] == 0
+    # Plain polling only acts on letmein itself, which was reset during the outage
+    assert simulator.run(trace)['unlocks'] == 0
+
+
+def test_outage_restart():
+    # 30s outage: 10 failed polls, a systemd restart, 10 more, another restart;
+    # the client then serves commands normally
+    trace = [
+        {"t": 5, "type": "outage", "duration": 30, "mode": "refused"},
+        {"t": 60, "type": "command", "letmein": True, "sound": "none"},
+        {"t": 63, "type": "command", "letmein": False},
+    ]
+    stats = simulator.run(trace)
+    assert stats['restarts'] == 2
+    assert stats['unlocks'] == 1
+    assert stats['missed_commands'] == 0
+    assert stats['unlock_latency'][0] < simulator.client.POLL_INTERVAL
+
+
+def test_server_restart():
+    # server.py restarts between commands, forgetting the registration and
+    # resetting unlock_count; the next command's wake-up never arrives, and
+    # the heartbeat poll must still serve it from the new boot's count
+    trace = [
+        {"t": 10, "type": "command", "letmein": True, "sound": "none"},
+        {"t": 13, "type": "command", "letmein": False},
+        {"t": 30, "type": "command", "letmein": True, "sound": "none"},
+        {"t": 33, "type": "command", "letmein": False},
+        {"t": 45, "type": "restart"},
+        {"t": 46, "type": "command", "letmein": True, "sound": "none"},
+        {"t": 49, "type": "command", "letmein": False},
+    ]
+    stats = simulator.run(trace, notify=True)
+    assert stats['unlocks'] == 3
+    assert stats['missed_commands'] == 0
+    assert stats['unlock_latency'][2] > 3
+
+
+def test_status_shortcut_matches_flask():
+    # SimServer answers GET / from server.status_payload() without Flask;
+    # it must match what the real endpoint returns
+    sim = simulator.SimServer(simulator.VirtualClock(end=0), notify_key='simulated')
+    sim.set_state(True, "none")
+    sim.clock.advance(1.5)
+    sim.set_state(False)
+    assert sim.app.get('/').get_json() == simulator.doorbot_server.status_payload()
+
+
+def test_synthetic_trace():
+    trace = simulator.synthetic_trace(50, seed=1)
+    stats = simulator.run(trace)
+    assert stats['commands'] == 50
+    assert stats['unlocks'] == 41
+    assert stats['missed_commands'] == 9
+    assert stats['switch_timeouts'] == 1
+    assert abs(stats['motor_on_time'] - 417.2) < 0.01
+    assert not stats['relay_left_on']
+    # Wake-ups plus unlock_count catch-up serve every command
+    stats = simulator.run(trace, notify=True)
+    assert stats['unlocks'] == 50
+    assert stats['missed_commands'] == 0
+    assert abs(stats['motor_on_time'] - 501.5) < 0.01
+
+if __name__ == '__main__':
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith('test_')]
+    for name, fn in tests:
+        fn()
+        print(f"✓ {name}")
+    print(f"{len(tests)} tests passed")
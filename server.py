@@ -9,10 +9,17 @@ This server replicates the original API to work with:
 API Endpoints:
 - GET  /  → Returns {"letmein": true/false} for Pi client polling
 - POST /  → Accepts {"status": {"letmein": true/false}} from chatbot
+- POST /notify → Pi client registers for UDP wake-up notifications
 """
 
 from flask import Flask, jsonify, render_template_string, request
 from datetime import datetime
+import hashlib
+import hmac
+import os
+import socket
+import struct
+import time
 
 app = Flask(__name__)
 
@@ -22,8 +29,61 @@ door_state = {
     "last_command_time": None,
     "last_unlock_user": None,
     "sound": "",
-    "sounds": []
+    "sounds": [],
+    "state_version": 0,
+    "unlock_count": 0,
+    "boot_id": os.urandom(4).hex()  # changes on restart so clients reset their baseline
 }
+last_unlock_at = None  # time.time() of the most recent unlock command
+
+# UDP wake-up notifications (disabled unless a shared key is configured).
+# Must match raspberry_pi/notify.py.
+NOTIFY_KEY = os.getenv("DOORBOT_NOTIFY_KEY", "")
+NOTIFY_MAGIC = b"DBN1"
+NOTIFY_HEADER = struct.Struct("!4sQ")
+NOTIFY_MAC_SIZE = 16
+NOTIFY_REPEAT = 2  # datagrams per state change, in case one is dropped
+NOTIFY_EXPIRY = 180  # seconds before an unrefreshed registration is dropped
+REGISTRATION_MAX_SKEW = 60
+
+# Registered Pi clients: ip -> (udp port, last registration time)
+notify_subscribers = {}
+# Registrations accepted within the last REGISTRATION_MAX_SKEW: mac -> timestamp.
+# Each signed registration is single-use, so a captured one cannot be replayed.
+seen_registrations = {}
+notify_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+
+def notify_mac(message):
+    return hmac.new(NOTIFY_KEY.encode(), message, hashlib.sha256).digest()[:NOTIFY_MAC_SIZE]
+
+
+def notify_packet():
+    """Signed "state version N" datagram for the current state"""
+    header = NOTIFY_HEADER.pack(NOTIFY_MAGIC, door_state['state_version'])
+    return header + notify_mac(header)
+
+
+def send_packet(packet, ip, port):
+    for _ in range(NOTIFY_REPEAT):
+        try:
+            notify_socket.sendto(packet, (ip, port))
+        except OSError as e:
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Notify to {ip}:{port} failed: {e}")
+            return
+
+
+def send_notifications():
+    """Send the current state version to every registered Pi"""
+    if not NOTIFY_KEY:
+        return
+    packet = notify_packet()
+    now = time.time()
+    for ip, (port, last_seen) in list(notify_subscribers.items()):
+        if now - last_seen > NOTIFY_EXPIRY:
+            notify_subscribers.pop(ip, None)  # another request may have expired it
+            continue
+        send_packet(packet, ip, port)
 
 # Web interface HTML
 WEB_INTERFACE = '''
@@ -226,6 +286,14 @@ WEB_INTERFACE = '''
 </html>
 '''
 
+def status_payload():
+    """
+    Body of GET / - the door state plus how long ago the last unlock was,
+    so a client that missed the letmein window can catch up
+    """
+    unlock_age = None if last_unlock_at is None else round(time.time() - last_unlock_at, 1)
+    return {**door_state, "unlock_age": unlock_age}
+
 @app.route('/', methods=['GET', 'POST'])
 def root_endpoint():
     """
@@ -234,11 +302,11 @@ def root_endpoint():
     GET: Returns door status for Raspberry Pi client polling
     POST: Accepts door control commands from Element chatbot
     """
+    global last_unlock_at
 
     if request.method == 'GET':
         # Raspberry Pi client polling for status
-        # Return simple JSON with letmein status
-        return jsonify(door_state)
+        return jsonify(status_payload())
 
     elif request.method == 'POST':
         # Element chatbot sending unlock/lock command
@@ -248,10 +316,17 @@ def root_endpoint():
             data = request.get_json()
 
             if data and 'status' in data and 'letmein' in data['status']:
-                # Update the letmein status
+                # Update the letmein status. Unlocks are also counted, and the
+                # sound kept after the reset, so the Pi can act on an unlock
+                # whose 3s letmein window it never saw.
                 door_state['letmein'] = data['status']['letmein']
-                door_state['sound'] = data['status'].get('sound', '')
+                if door_state['letmein']:
+                    door_state['sound'] = data['status'].get('sound', '')
+                    door_state['unlock_count'] += 1
+                    last_unlock_at = time.time()
                 door_state['last_command_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                door_state['state_version'] += 1
+                send_notifications()
 
                 # Log the command
                 ip = request.remote_addr
@@ -287,6 +362,44 @@ def sounds_endpoint():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/notify', methods=['POST'])
+def notify_endpoint():
+    """
+    POST /notify → Pi client registers its UDP port for wake-up notifications
+    Expected format: {"port": 8879, "timestamp": <unix time>, "mac": "<hex>"}
+    """
+    if not NOTIFY_KEY:
+        return jsonify({"error": "Notifications disabled"}), 404
+
+    data = request.get_json(silent=True) or {}
+    try:
+        port = int(data['port'])
+        timestamp = int(data['timestamp'])
+        mac = bytes.fromhex(data['mac'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Invalid data format"}), 400
+
+    now = time.time()
+    expected = notify_mac(f"register:{port}:{timestamp}".encode())
+    if (not 0 < port < 65536 or abs(now - timestamp) > REGISTRATION_MAX_SKEW
+            or not hmac.compare_digest(mac, expected)):
+        return jsonify({"error": "Invalid registration"}), 403
+
+    for seen_mac, seen_timestamp in list(seen_registrations.items()):
+        if abs(now - seen_timestamp) > REGISTRATION_MAX_SKEW:
+            seen_registrations.pop(seen_mac, None)
+    if mac in seen_registrations:
+        return jsonify({"error": "Registration already used"}), 403
+    seen_registrations[mac] = timestamp
+
+    ip = request.remote_addr
+    if ip not in notify_subscribers:
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Notify registration from {ip}:{port}")
+    notify_subscribers[ip] = (port, now)
+    # Probe, so the Pi only relies on wake-ups once it knows UDP gets through
+    send_packet(notify_packet(), ip, port)
+    return jsonify({"success": True, "state_version": door_state['state_version']}), 200
+
 @app.route('/control')
 def web_interface():
     """Web interface for manual control"""
@@ -312,6 +425,7 @@ if __name__ == '__main__':
     print(f"API Endpoints:")
     print(f"  GET  / → Pi client polls for status")
     print(f"  POST / → Chatbot sends unlock commands")
+    print(f"  POST /notify → Pi registers for UDP wake-ups ({'enabled' if NOTIFY_KEY else 'disabled'})")
     print(f"  GET  /control → Web interface")
     print(f"  GET  /health → Health check")
     print(f"")
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+End-to-end test for UDP wake-up notifications on localhost
+
+Starts server.py on an ephemeral port and runs the real doorbot_client.main()
+loop against it in a background thread, with simulator.SimGPIO standing in
+for the relay, motor and limit switch. Measures the time from the unlock POST
+until the client switches the relay on in unlock_door().
+
+Covers: registration probe and heartbeat back-off, wake-ups, a lost wake-up
+(the unlock must still happen after letmein is reset), and re-registration
+after the server forgets its state.
+
+Usage:
+    python3 test_notify.py [trials]
+"""
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+KEY = "test-notify-key"
+HEARTBEAT = 3.0  # shortened client heartbeat so the lost-packet case runs quickly
+COMMAND_WINDOW = 0.5  # seconds letmein stays true, like the chatbot's 3s reset
+
+
+class WallClock:
+    """The clock interface SimGPIO needs, on real time"""
+
+    @property
+    def now(self):
+        return time.monotonic()
+
+    def schedule(self, at, callback):
+        threading.Timer(max(0.0, at - self.now), callback).start()
+
+
+class DroppingSocket:
+    """Wraps server.notify_socket so the test can lose wake-ups on purpose"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.drop = False
+
+    def sendto(self, packet, address):
+        if not self.drop:
+            self.sock.sendto(packet, address)
+
+
+def main():
+    sys.path.insert(0, os.path.join(ROOT, 'raspberry_pi'))
+    import requests
+    from werkzeug.serving import make_server
+    import server
+    import simulator  # registers a placeholder RPi.GPIO off the Pi
+    import doorbot_client as client
+    import notify
+    from notify import NotifyListener, sign_registration
+
+    trials = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    print("=" * 60)
+    print("🧪 Testing UDP wake-up notifications")
+    print("=" * 60)
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server.print = client.print = lambda *args, **kwargs: None
+    server.NOTIFY_KEY = KEY
+    server.notify_socket = DroppingSocket(server.notify_socket)
+    httpd = make_server('127.0.0.1', 0, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{httpd.server_port}"
+
+    unlock_started = threading.Event()
+    unlock_done = threading.Event()
+    unlock_times = []
+
+    class TestGPIO(simulator.SimGPIO):
+        def output(self, pin, value):
+            super().output(pin, value)
+            if pin == client.RELAY_PIN and not value:
+                unlock_done.set()
+
+    def on_unlock():
+        unlock_times.append(time.perf_counter())
+        unlock_started.set()
+
+    listeners = []
+
+    def make_listener(key, port):
+        listeners.append(NotifyListener(key, port, host='127.0.0.1'))
+        return listeners[-1]
+
+    gpio = TestGPIO(WallClock())
+    gpio.switch_delay = 0.05
+    gpio.on_unlock = on_unlock
+    client.GPIO = gpio
+    notify.NotifyListener = make_listener  # doorbot_client imports it lazily
+    client.SERVER_URL = url
+    client.NOTIFY_KEY = KEY
+    client.NOTIFY_PORT = 0
+    client.HEARTBEAT_INTERVAL = HEARTBEAT
+    client.UNLOCK_HOLD_TIME = 0.2
+    client.REVERSE_TIME = 0.1
+    threading.Thread(target=client.main, daemon=True).start()
+
+    session = requests.Session()
+    failures = 0
+
+    def check(ok, message):
+        nonlocal failures
+        print(f"{'✓' if ok else '✗'} {message}")
+        if not ok:
+            failures += 1
+        return ok
+
+    def wait_for(condition, timeout):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def command(drop=False):
+        """Send an unlock like the chatbot does; return seconds until the relay came on"""
+        unlock_started.clear()
+        unlock_done.clear()
+        server.notify_socket.drop = drop
+        start = time.perf_counter()
+        session.post(url, json={"status": {"letmein": True, "sound": "none"}}, timeout=5)
+        time.sleep(COMMAND_WINDOW)
+        session.post(url, json={"status": {"letmein": False}}, timeout=5)
+        server.notify_socket.drop = False
+        started = unlock_started.wait(HEARTBEAT + 2)
+        unlock_done.wait(5)
+        time.sleep(0.2)  # let the client poll once more and go back to waiting
+        return unlock_times[-1] - start if started else None
+
+    try:
+        # Test 1: Client registers and receives the probe
+        check(wait_for(lambda: listeners and listeners[0].packets > 0, 5),
+              "Client registered and received the registration probe")
+        time.sleep(0.2)  # let the client settle into the heartbeat wait
+
+        # Test 2: Forged and replayed registrations are rejected
+        forged = session.post(url + '/notify', json=sign_registration("wrong-key", 9), timeout=5)
+        check(forged.status_code == 403, f"Forged registration rejected ({forged.status_code})")
+        captured = sign_registration(KEY, 9)
+        session.post(url + '/notify', json=captured, timeout=5)
+        replayed = session.post(url + '/notify', json=captured, timeout=5)
+        check(replayed.status_code == 403, f"Replayed registration rejected ({replayed.status_code})")
+        server.notify_subscribers.pop('127.0.0.1', None)  # drop the test's own port 9
+        session.post(url + '/notify', json=sign_registration(KEY, listeners[0].port,
+                                                             int(time.time()) + 1), timeout=5)
+
+        # Test 3: Command → wake-up → unlock_door
+        latencies = [command() for _ in range(trials)]
+        delivered = [l for l in latencies if l is not None]
+        check(len(delivered) == trials, f"{len(delivered)}/{trials} unlocks after wake-up")
+        if delivered:
+            median = statistics.median(delivered)
+            check(median < COMMAND_WINDOW,
+                  f"Command → unlock: median {median * 1000:.1f} ms, max {max(delivered) * 1000:.1f} ms "
+                  f"(1 s polling alone averages ~500 ms)")
+
+        # Test 4: Lost wake-up; letmein is reset before the heartbeat poll
+        latency = command(drop=True)
+        check(latency is not None and latency > COMMAND_WINDOW,
+              "Unlock still happens after a lost wake-up, once letmein is reset")
+        if latency is not None:
+            print(f"  Command → unlock: {latency:.2f} s (heartbeat {HEARTBEAT:.0f} s)")
+
+        # Test 5: Server restart forgets the registration; client re-registers
+        server.notify_subscribers.clear()
+        server.door_state['state_version'] = 0
+        server.door_state['unlock_count'] = 0
+        server.door_state['boot_id'] = os.urandom(4).hex()
+        server.last_unlock_at = None
+        check(wait_for(lambda: '127.0.0.1' in server.notify_subscribers, 2 * HEARTBEAT + 2),
+              "Client re-registered after server restart")
+        latency = command()
+        check(latency is not None and latency < COMMAND_WINDOW,
+              "Wake-ups work again after re-registration")
+
+        check(unlock_done.is_set() and not gpio.relay_on(), "Relay off after last unlock")
+    finally:
+        httpd.shutdown()
+
+    print("=" * 60)
+    print("✓ Tests Complete" if not failures else f"✗ {failures} failures")
+    print("=" * 60)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())